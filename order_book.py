@@ -6,6 +6,7 @@ import os.path
 import platform
 import time
 from abc import abstractmethod
+from itertools import accumulate
 from operator import le, ge
 from pathlib import Path
 
@@ -130,6 +131,7 @@ class OrderBook(object):
         self.bids = BidSide()
         self.asks = AskSide()
         self.sequence_number = 0
+        self.in_auction = False
 
     def get_sequence_number(self):
         self.sequence_number += 1
@@ -145,6 +147,9 @@ class OrderBook(object):
         When orders are matched (bids with asks or vice versa) they become trades and are written to the trade file"""
         matches = []
         other_side, this_side, compare = (self.asks, self.bids, le) if is_bid else (self.bids, self.asks, ge)
+        if self.in_auction:  # Call phase - orders accumulate and are only matched at the uncross
+            this_side.add(order)
+            return
         matched_orders_to_remove = []
         for other in other_side:  # Go down the orders
             if compare(other.price, order.price):
@@ -171,9 +176,76 @@ class OrderBook(object):
         if matches:  # Write matches to trades file
             self.trade_csv_file.writerows([dict(zip(self.trade_csv_file.fieldnames, match)) for match in matches])
 
-
-def read_streamed_orders(trades_file_name, pipe_name='order_pipe'):
-    """Read orders from a stream - implemented as a pipe.  Tolerant to initial unavailability of pipe"""
+    def start_auction(self):
+        """Enter the call phase of an auction.  Orders passed to match() are added to the book without matching
+        until uncross() is called"""
+        self.in_auction = True
+
+    def equilibrium_price(self):
+        """The auction price which maximises executable volume.  Ties are broken by the smallest surplus (the
+        unmatched volume at that price) and then by the lowest price.
+        Returns (price, volume) or (None, 0) if the book does not cross"""
+        bid_volumes, ask_volumes = {}, {}
+        for bid in self.bids:
+            bid_volumes[bid.price] = bid_volumes.get(bid.price, 0) + bid.quantity
+        for ask in self.asks:
+            ask_volumes[ask.price] = ask_volumes.get(ask.price, 0) + ask.quantity
+        prices = sorted(bid_volumes.keys() | ask_volumes.keys())
+        # Bids at or above each price and asks at or below it, accumulated over the price levels in one pass each
+        cumulative_asks = accumulate(ask_volumes.get(price, 0) for price in prices)
+        cumulative_bids = reversed(list(accumulate(bid_volumes.get(price, 0) for price in reversed(prices))))
+        best_key, best_price, best_volume = None, None, 0
+        for price, bid_volume, ask_volume in zip(prices, cumulative_bids, cumulative_asks):
+            volume = min(bid_volume, ask_volume)
+            key = (-volume, abs(bid_volume - ask_volume), price)
+            if volume and (best_key is None or key < best_key):
+                best_key, best_price, best_volume = key, price, volume
+        return best_price, best_volume
+
+    def uncross(self):
+        """End the call phase of an auction.  All crossing orders are executed at the equilibrium price in price-time
+        priority and any residual quantities stay in the book, which then returns to continuous matching.
+        Trades are written to the trade file in the same format as match().  Returns the equilibrium price or None"""
+        self.in_auction = False
+        price, volume = self.equilibrium_price()
+        if not volume:
+            return None
+        matches = []
+        bids, asks = iter(self.bids), iter(self.asks)
+        bid, ask = next(bids), next(asks)
+        bid_remaining, ask_remaining = bid.quantity, ask.quantity
+        filled_bids, filled_asks = [], []
+        while volume:
+            quantity = min(bid_remaining, ask_remaining, volume)
+            matches.append([bid.customer, ask.customer, self.name, quantity, price])
+            volume -= quantity
+            bid_remaining -= quantity
+            ask_remaining -= quantity
+            if not bid_remaining:
+                filled_bids.append(bid)
+                if volume:
+                    bid = next(bids)
+                    bid_remaining = bid.quantity
+            if not ask_remaining:
+                filled_asks.append(ask)
+                if volume:
+                    ask = next(asks)
+                    ask_remaining = ask.quantity
+        # Finished iterating - now apply changes to book data structures, keeping priority of partially filled orders
+        for side, filled, partial, remaining in ((self.bids, filled_bids, bid, bid_remaining),
+                                                 (self.asks, filled_asks, ask, ask_remaining)):
+            for order in filled:
+                side.remove(order)
+            if remaining:
+                side.remove(partial)
+                side.add(Order(remaining, partial.price, partial.customer, partial.sequence_number))
+        self.trade_csv_file.writerows([dict(zip(self.trade_csv_file.fieldnames, match)) for match in matches])
+        return price
+
+
+def read_streamed_orders(trades_file_name, pipe_name='order_pipe', auction=False):
+    """Read orders from a stream - implemented as a pipe.  Tolerant to initial unavailability of pipe.
+    In an auction the books are uncrossed when the stream ends"""
     finished = False
     while not finished:
         try:
@@ -189,10 +261,11 @@ def read_streamed_orders(trades_file_name, pipe_name='order_pipe'):
                     order_line = order_pipe.get_line()
                     if order_line:
                         order_data = dict(zip(header, [o.strip() for o in order_line.split(',')]))
-                        place_order(order_book, order_data, trade_csv_file)
+                        place_order(order_book, order_data, trade_csv_file, auction)
                     else:
                         finished = True
                         break
+                uncross_auctions(order_book)
         except OSError as ose:
             if hasattr(ose, 'winerror'):  #
                 if winerror == winerror.ERROR_FILE_NOT_FOUND:
@@ -209,8 +282,8 @@ def read_streamed_orders(trades_file_name, pipe_name='order_pipe'):
             finished = True
 
 
-def read_file_orders(orders_file, trades_file_name):
-    """REad orders from a file"""
+def read_file_orders(orders_file, trades_file_name, auction=False):
+    """REad orders from a file.  In an auction the books are uncrossed once all the orders are read"""
     clear_path(trades_file_name)
     header = ['Buyer', 'Seller', 'Item', 'Quantity', 'Price']
     order_book = {}
@@ -220,14 +293,18 @@ def read_file_orders(orders_file, trades_file_name):
         with open(orders_file) as orders_file:
             data_reader = csv.DictReader(orders_file)
             for order_data in data_reader:
-                place_order(order_book, order_data, trade_csv_file)
+                place_order(order_book, order_data, trade_csv_file, auction)
+            uncross_auctions(order_book)
 
 
-def place_order(order_book, order_data, trade_csv_file):
-    """Place an order in the appropriate order book and try to match it.  Results written to provided CSV file"""
+def place_order(order_book, order_data, trade_csv_file, auction=False):
+    """Place an order in the appropriate order book and try to match it.  Results written to provided CSV file.
+    New books start in the call phase of an auction if requested"""
     name = order_data['Item']
     if name not in order_book:
         order_book[name] = OrderBook(name, trade_csv_file)
+        if auction:
+            order_book[name].start_auction()
     order = Order(int(order_data['Quantity']), int(order_data['Price']), order_data['Customer'].strip(),
                   order_book[name].get_sequence_number())
     order_book[name].match(order, order_data['Side'] == 'Buy')
@@ -235,13 +312,21 @@ def place_order(order_book, order_data, trade_csv_file):
     logging.debug(f"Order book for {name} size: {order_book[name].depth}.")
 
 
+def uncross_auctions(order_book):
+    """Uncross every order book still in the call phase of an auction"""
+    for name, book in order_book.items():
+        if book.in_auction:
+            price = book.uncross()
+            logging.debug(f"Uncrossed {name} at price {price}.  Order book size: {book.depth}.")
+
+
 def execute(arguments):
     if arguments.debug:
         logging.basicConfig(level=logging.DEBUG)
     if arguments.orders_file:
-        read_file_orders(arguments.orders_file, arguments.trade_file)
+        read_file_orders(arguments.orders_file, arguments.trade_file, arguments.auction)
     else:
-        read_streamed_orders(arguments.trade_file, arguments.pipe_name)
+        read_streamed_orders(arguments.trade_file, arguments.pipe_name, arguments.auction)
 
 
 def construct_arg_parser():
@@ -252,6 +337,8 @@ def construct_arg_parser():
                        help='name of pipe from client')
     p.add_argument('-t', '--trade_file', metavar='path', required=True,
                         help='path to file to write matched trades')
+    p.add_argument('-a', '--auction', action='store_true',
+                   help='collect all orders in an auction call phase and uncross them at the end')
     p.add_argument('-D', '--debug', action='store_true', help='turn on DEBUG logging')
 
     return p
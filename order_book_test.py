@@ -166,5 +166,65 @@ class TestMarketOrders(unittest.TestCase):
             self.assertEqual(match, ['Customer1', 'Seller1', 'IBM', 10, 100 + n - 1])
 
 
+class TestAuction(unittest.TestCase):
+    def test_no_matching_in_call_phase(self):
+        dummy_csv_file = DummyTradeCSVFile()
+        ibm_book = order_book.OrderBook('IBM', dummy_csv_file)
+        ibm_book.start_auction()
+        ibm_book.match(order_book.Order(10, 100, 'Customer1', ibm_book.get_sequence_number()), BUY)
+        ibm_book.match(order_book.Order(10, 90, 'Seller1', ibm_book.get_sequence_number()), SELL)
+        self.assertEqual(ibm_book.depth, 2)
+        self.assertEqual(dummy_csv_file.get_rows(), [])
+
+    def test_uncross_at_equilibrium_price(self):
+        dummy_csv_file = DummyTradeCSVFile()
+        ibm_book = order_book.OrderBook('IBM', dummy_csv_file)
+        ibm_book.start_auction()
+        for quantity, price, customer, is_bid in [(10, 102, 'Customer1', BUY), (20, 101, 'Customer2', BUY),
+                                                  (10, 99, 'Customer3', BUY), (15, 98, 'Seller1', SELL),
+                                                  (10, 101, 'Seller2', SELL), (30, 103, 'Seller3', SELL)]:
+            ibm_book.match(order_book.Order(quantity, price, customer, ibm_book.get_sequence_number()), is_bid)
+        self.assertEqual(ibm_book.equilibrium_price(), (101, 25))
+        self.assertEqual(ibm_book.uncross(), 101)
+        self.assertEqual(dummy_csv_file.get_rows(), [['Customer1', 'Seller1', 'IBM', 10, 101],
+                                                     ['Customer2', 'Seller1', 'IBM', 5, 101],
+                                                     ['Customer2', 'Seller2', 'IBM', 10, 101]])
+        self.assertEqual([(o.quantity, o.price, o.customer) for o in ibm_book.bids],
+                         [(5, 101, 'Customer2'), (10, 99, 'Customer3')])
+        self.assertEqual([(o.quantity, o.price, o.customer) for o in ibm_book.asks], [(30, 103, 'Seller3')])
+
+    def test_uncross_time_priority(self):
+        dummy_csv_file = DummyTradeCSVFile()
+        ibm_book = order_book.OrderBook('IBM', dummy_csv_file)
+        ibm_book.start_auction()
+        ibm_book.match(order_book.Order(10, 100, 'Customer1', ibm_book.get_sequence_number()), BUY)
+        ibm_book.match(order_book.Order(10, 100, 'Customer2', ibm_book.get_sequence_number()), BUY)
+        ibm_book.match(order_book.Order(15, 100, 'Seller1', ibm_book.get_sequence_number()), SELL)
+        ibm_book.uncross()
+        self.assertEqual(dummy_csv_file.get_rows(), [['Customer1', 'Seller1', 'IBM', 10, 100],
+                                                     ['Customer2', 'Seller1', 'IBM', 5, 100]])
+        self.assertEqual(ibm_book.depth, 1)
+
+    def test_uncross_without_cross(self):
+        trade_csv_file = MagicMock()
+        ibm_book = order_book.OrderBook('IBM', trade_csv_file)
+        ibm_book.start_auction()
+        ibm_book.match(order_book.Order(10, 99, 'Customer1', ibm_book.get_sequence_number()), BUY)
+        ibm_book.match(order_book.Order(10, 100, 'Seller1', ibm_book.get_sequence_number()), SELL)
+        self.assertIsNone(ibm_book.uncross())
+        self.assertFalse(trade_csv_file.writerows.called)
+        self.assertEqual(ibm_book.depth, 2)
+
+    def test_continuous_matching_after_uncross(self):
+        dummy_csv_file = DummyTradeCSVFile()
+        ibm_book = order_book.OrderBook('IBM', dummy_csv_file)
+        ibm_book.start_auction()
+        ibm_book.match(order_book.Order(10, 100, 'Customer1', ibm_book.get_sequence_number()), BUY)
+        ibm_book.uncross()
+        ibm_book.match(order_book.Order(10, 90, 'Seller1', ibm_book.get_sequence_number()), SELL)
+        self.assertEqual(ibm_book.depth, 0)
+        self.assertEqual(dummy_csv_file.get_rows(), [['Customer1', 'Seller1', 'IBM', 10, 100]])
+
+
 if __name__ == '__main__':
     unittest.main()